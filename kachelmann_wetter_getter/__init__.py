@@ -1,9 +1,9 @@
 '''Parse weather data on https://kachelmannwetter.com/.
 '''
 
+from ._version import __version__, version_info
 from ._http import *
 from ._station_id import *
-from ._version import *
 from ._weather import *
 
 
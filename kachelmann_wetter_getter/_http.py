@@ -4,7 +4,13 @@ from threading import Lock
 from typing import Callable, Optional, ContextManager
 
 from requests import Session
-from semver import format_version
+from requests.adapters import HTTPAdapter, Retry
+
+try:
+    import httpx
+except ImportError:
+    # optional; only needed for the asynchronous API
+    httpx = None
 
 from ._version import version_info
 
@@ -19,7 +25,7 @@ headers = {
     'User-Agent': default_user_agent,
 }
 
-header_modication_tracker = object()
+_header_version = 0
 
 logger = getLogger(__name__)
 
@@ -29,8 +35,12 @@ SessionGetter = Callable[[], ContextManager[Session]]
 def invalidate_sessions():
     '''Invalidates all sessions created with new_session_getter().
     '''
-    global header_modication_tracker
-    header_modication_tracker = object()
+    global _header_version
+    _header_version += 1
+
+
+def _current_header_version() -> int:
+    return _header_version
 
 
 def set_user_agent(user_agent: str, *, replace: bool = False):
@@ -61,9 +71,44 @@ def new_session() -> Session:
     '''
     session = Session()
     session.headers.update(headers)
+
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+    )
+    session.mount('https://', adapter)
+
     return session
 
 
+def new_async_client() -> 'httpx.AsyncClient':
+    '''Create a new asynchronous web client.
+
+    The client multiplexes requests over HTTP/2 and picks up the headers
+    that are current at creation time.
+
+    Returns
+    -------
+    httpx.AsyncClient
+        a new httpx client
+
+    Raises
+    ------
+    RuntimeError
+        httpx is not installed; install the ``async`` extra
+    '''
+    if httpx is None:
+        raise RuntimeError("httpx is not installed; install the 'async' extra "
+                           'to use the asynchronous API')
+
+    return httpx.AsyncClient(
+        headers=headers,
+        http2=True,
+        limits=httpx.Limits(max_connections=16),
+    )
+
+
 def new_session_getter(name: Optional[str] = None) -> SessionGetter:
     '''Create a session cache that returns an existing session unless the user agent was modified.
 
@@ -78,26 +123,26 @@ def new_session_getter(name: Optional[str] = None) -> SessionGetter:
         a new requests session
     '''
     lock = Lock()
+    state = {'session': None, 'tracker': None}
 
     if name is None:
         name = '<unspecified>'
 
+    @contextmanager
+    def lock_session_context():
+        with lock:
+            yield state['session']
+
     def getter():
-        @contextmanager
-        def lock_session_context():
+        if state['session'] is None or state['tracker'] != _header_version:
             with lock:
-                yield session
-
-        while True:
-            logger.debug('Creating a new session for name=%r', name)
-            with new_session() as session:
-                old_tracker = header_modication_tracker
-                while True:
-                    cur_tracker = header_modication_tracker
-                    if cur_tracker is not old_tracker:
-                        old_tracker = cur_tracker
-                        break
+                old_session = state['session']
+                logger.debug('Creating a new session for name=%r', name)
+                state['session'] = new_session()
+                state['tracker'] = _header_version
+            if old_session is not None:
+                old_session.close()
 
-                    yield lock_session_context()
+        return lock_session_context()
 
-    return getter().__next__
+    return getter
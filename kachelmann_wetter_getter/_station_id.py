@@ -1,21 +1,24 @@
 from collections.abc import MutableMapping
+from functools import lru_cache
 from logging import getLogger
 from threading import Lock
 from typing import Optional, Any, Union, ContextManager
 
-from ._http import new_session_getter, SessionGetter
+from ._http import (new_session_getter, new_async_client, _current_header_version,
+                    SessionGetter)
 
 
 __all__ = 'LocationCache', 'CouldNotRetrieve', 'NoSuchLocation'
 
 
 class LocationResult:
-    pass
+    __slots__ = ()
 
 
 class StationId(int, LocationResult):
     '''An integer that defines the looked up station.
     '''
+    __slots__ = ()
 
 
 class CouldNotRetrieve(LocationResult):
@@ -23,6 +26,8 @@ class CouldNotRetrieve(LocationResult):
 
     This result is never cached.
     '''
+    __slots__ = ()
+
     def __bool__(self):
         return False
 
@@ -32,10 +37,18 @@ class NoSuchLocation(LocationResult):
 
     This result gets cached unless caching of lookup failures is deactivated.
     '''
+    __slots__ = ()
+
     def __bool__(self):
         return False
 
 
+@lru_cache(maxsize=512)
+def _station_id(stationid: int) -> StationId:
+    # repeated lookups resolving to the same station share one instance
+    return StationId(stationid)
+
+
 could_not_retrieve = CouldNotRetrieve()
 no_such_location = NoSuchLocation()
 
@@ -44,6 +57,18 @@ AnyLocation = Union[LocationResult, str, int]
 logger = getLogger(__name__)
 
 
+def _search_result(status_code: int, location: Optional[str]) -> LocationResult:
+    if not (300 <= status_code < 400):
+        if 200 <= status_code < 300:
+            return no_such_location
+        else:
+            return could_not_retrieve
+
+    stationid_name = location.rpartition('/')[2]
+
+    return _station_id(int(stationid_name.partition('-')[0]))
+
+
 class LocationCache:
     '''Look up queryable locations by name.
     '''
@@ -74,6 +99,28 @@ class LocationCache:
         self.cache = cache
         self.get_session = get_session
         self.cache_absent = cache_absent
+        self._async_client = None
+        self._async_header_version = None
+
+    async def _get_async_client(self):
+        # mirrors new_session_getter(): a client built before the last
+        # invalidate_sessions()/set_user_agent() call is stale and gets
+        # replaced, since httpx snapshots the headers at construction
+        client = self._async_client
+        version = _current_header_version()
+        if client is None or self._async_header_version != version:
+            if client is not None:
+                await client.aclose()
+            client = self._async_client = new_async_client()
+            self._async_header_version = version
+        return client
+
+    async def aclose(self):
+        '''Close the asynchronous client, if one was created.
+        '''
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
 
     def search_location(self, name: str) -> LocationResult:
         '''Search for a location by name.
@@ -107,17 +154,25 @@ class LocationCache:
                 logger.error('Could not query', exc_info=True)
                 return could_not_retrieve
 
-        if status_code not in range(300, 400):
-            if status_code in range(200, 300):
-                return no_such_location
-            else:
-                return could_not_retrieve
+        return _search_result(status_code, location)
+
+    async def search_location_async(self, name: str) -> LocationResult:
+        '''Search for a location by name without blocking the event loop.
 
-        *_, stationid_name = location.rsplit('/', 1)
-        stationid, *_ = stationid_name.split('-', 1)
-        stationid = int(stationid)
+        Same contract as search_location().
+        '''
+        data = {
+            'forecast_action': 'wetter',
+            'forecast_input': name,
+        }
+        client = await self._get_async_client()
+        try:
+            resp = await client.post(self.SEARCH_URL, data=data)
+        except Exception:
+            logger.error('Could not query', exc_info=True)
+            return could_not_retrieve
 
-        return StationId(stationid)
+        return _search_result(resp.status_code, resp.headers.get('Location'))
 
     def get_location(self, name: str) -> Optional[StationId]:
         '''Search for a location by name and cache the result
@@ -136,21 +191,25 @@ class LocationCache:
         '''
         with self.lock:
             result = self.cache.get(name)
-            if result is not None:
-                return result
-
-            result = self.search_location(name)
-            if isinstance(result, CouldNotRetrieve):
-                return
-
-            if not isinstance(result, NoSuchLocation):
-                self.cache[name] = result
-            else:
-                if self.cache_absent:
-                    self.cache[name] = result
-                result = None
-
-            return result
+        if result is not None:
+            return result if not isinstance(result, NoSuchLocation) else None
+
+        # the network request runs without the lock so concurrent lookups
+        # for different names do not serialize on each other
+        result = self.search_location(name)
+        if isinstance(result, CouldNotRetrieve):
+            return
+
+        if not isinstance(result, NoSuchLocation):
+            with self.lock:
+                result = self.cache.setdefault(name, result)
+        else:
+            if self.cache_absent:
+                with self.lock:
+                    self.cache.setdefault(name, result)
+            result = None
+
+        return result
 
     def get_station_id(self, location: AnyLocation, **kw) -> Optional[int]:
         '''
@@ -183,3 +242,21 @@ class LocationCache:
             return +location
         elif not isinstance(location, LocationResult):
             raise TypeError(f'type(location)={type(location)!r} is not a Location')
+
+    async def get_station_id_async(self, location: AnyLocation) -> Optional[int]:
+        '''Look up a station ID or extract the result without blocking the event loop.
+
+        Same contract as get_station_id().
+        '''
+        if isinstance(location, str):
+            try:
+                return int(location)
+            except ValueError:
+                pass
+
+            location = await self.search_location_async(location)
+
+        if isinstance(location, int):
+            return +location
+        elif not isinstance(location, LocationResult):
+            raise TypeError(f'type(location)={type(location)!r} is not a Location')
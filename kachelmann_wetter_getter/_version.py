@@ -1,6 +1,6 @@
 from collections import namedtuple
 from os.path import dirname, join
-from re import match
+from re import compile as re_compile
 
 
 __all__ = '__version__', 'version_info',
@@ -8,9 +8,21 @@ __all__ = '__version__', 'version_info',
 
 Version = namedtuple('Version', 'major minor maintenance tag metadata')
 
+_VERSION_RE = re_compile(r'\A(\d+)\.(\d+)\.(\d+)([a-z]+\d+)?(?:\.([a-z]+\d+))?\Z')
+
+_parsed_versions = {}
+
+
+def _parse_version(version):
+    result = _parsed_versions.get(version)
+    if result is None:
+        groups = _VERSION_RE.match(version).groups()
+        result = Version(*(int(s) for s in groups[:3]), *groups[3:])
+        _parsed_versions[version] = result
+    return result
+
+
 with open(join(dirname(__file__), 'VERSION'), 'rt') as f:
     __version__ = f.read().strip()
 
-groups = match('\A(\d+)\.(\d+)\.(\d+)([a-z]+\d+)?(?:\.([a-z]+\d+))?\Z', __version__).groups()
-
-version_info = Version(*(int(s) for s in groups[:3]), *groups[3:])
+version_info = _parse_version(__version__)
@@ -1,10 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import Optional, List, NewType
+from re import compile as re_compile
+from typing import Optional, NewType, Sequence
 
 from dataclasses import dataclass
-from lxml.html.html5parser import fragment_fromstring
+from functools import lru_cache
+from lxml import etree
 
-from ._http import new_session_getter, SessionGetter
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    # optional fast path; the lxml code below covers everything
+    LexborHTMLParser = None
+
+from ._http import (new_session_getter, new_async_client, _current_header_version,
+                    SessionGetter)
 from ._station_id import AnyLocation, LocationCache
 
 
@@ -19,19 +29,19 @@ Percent = NewType('Percent', float)
 Millimeters = NewType('Millimeters', float)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SkyData:
     friendly_name: Optional[str]  # "bedeckt"
     symbol: str                   # "overcast"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WindData:
     direction: str   # "sw"
     strength: Kph    # 16.0
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NextHoursData:
     hours: int               # 13
     minutes: int             # 0
@@ -40,7 +50,7 @@ class NextHoursData:
     chance_of_rain: Percent  # 0.88
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NextDaysData:
     friendly_name: str       # "Montag"
     date: str                # "2.April"
@@ -49,21 +59,16 @@ class NextDaysData:
     avg_wind: WindData
     max_wind: Kph
     amount_rain: Millimeters
-    risks: List[SkyData]
+    risks: Sequence[SkyData]
     morning: SkyData
     afternoon: SkyData
     evening: SkyData
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NextHoursDaysData:
-    hours: List[NextHoursData]
-    days: List[NextDaysData]
-
-
-namespaces = {
-    'xhtml': 'http://www.w3.org/1999/xhtml',
-}
+    hours: Sequence[NextHoursData]
+    days: Sequence[NextDaysData]
 
 
 def has_class(name):
@@ -86,31 +91,129 @@ def text_content(node):
     return (node or '').replace('\xA0', ' ').strip()
 
 
+_NBSP_TABLE = str.maketrans({'\xA0': ' '})
+
+
+def _clean_text(text):
+    # for strings coming out of .../text() selectors, which are
+    # already str subclasses and need no type dispatch
+    return text.translate(_NBSP_TABLE).strip()
+
+
+@lru_cache(maxsize=256)
+def _symbol_from_src(src):
+    return src.rpartition('/')[2].partition('.')[0].split('_', 2)[1]
+
+
 def extract_symbol(img):
-    return img.get('src').rsplit('/', 1)[-1].split('.')[0].split('_', 2)[1]
+    # the set of distinct icon URLs is small, so the string
+    # dissection is memoized on the raw src attribute
+    return _symbol_from_src(img.get('src'))
+
+
+_NUM_RE = re_compile(r'-?\d+(?:\.\d+)?')
+_TIME_RE = re_compile(r'(\d+):(\d+)')
+
+
+def _num(text):
+    return float(_NUM_RE.search(text).group())
+
+
+def _compile_xpath(path):
+    return etree.XPath(path)
+
+
+# every class predicate the selectors need, folded once at import;
+# after the precompile pass below, has_class() never runs again
+_HAS = {
+    name: has_class(name)
+    for name in (
+        'fc-hours', 'fc-symbol', 'fc-temp', 'fc-rain',
+        'panel-heading', 'panel-body',
+        'wsymbol-morning', 'wsymbol-afternoon', 'wsymbol-evening',
+        'day-temp-maxmin', 'day-temp-max', 'day-temp-min', 'day-fc-temp',
+        'day-risks', 'day-fc-symbol',
+        'nexthours-scroll', 'day-row',
+    )
+}
 
 
-def xpath(node, path):
+# XPath expressions are compiled once at import time;
+# node.xpath() would re-parse the expression on every call.
+_XP_FC_HOURS = _compile_xpath(f'./div[{_HAS["fc-hours"]}]/text()')
+_XP_FC_SYMBOL = _compile_xpath(f'./div[{_HAS["fc-symbol"]}]')
+_XP_IMG = _compile_xpath('./img')
+_XP_FC_TEMP = _compile_xpath(f'./div[{_HAS["fc-temp"]}]/text()')
+_XP_FC_RAIN = _compile_xpath(f'./div[{_HAS["fc-rain"]}]/text()')
+_XP_PANEL_HEADING = _compile_xpath(f'./div[{_HAS["panel-heading"]}]/text()')
+_XP_PANEL_BODY = _compile_xpath(f'./div[{_HAS["panel-body"]}]')
+_XP_MORNING_IMG = _compile_xpath(f'./div[{_HAS["wsymbol-morning"]}]/img')
+_XP_AFTERNOON_IMG = _compile_xpath(f'./div[{_HAS["wsymbol-afternoon"]}]/img')
+_XP_EVENING_IMG = _compile_xpath(f'./div[{_HAS["wsymbol-evening"]}]/img')
+_XP_TEMP_MAXMIN = _compile_xpath(f'./div[{_HAS["day-temp-maxmin"]}]')
+_XP_TEMP_MAX = _compile_xpath(
+    f'./div[{_HAS["day-temp-max"]}]/div[{_HAS["day-fc-temp"]}]/text()',
+)
+_XP_TEMP_MIN = _compile_xpath(
+    f'./div[{_HAS["day-temp-min"]}]/div[{_HAS["day-fc-temp"]}]/text()',
+)
+_XP_DAY_RISKS = _compile_xpath(f'./div[{_HAS["day-risks"]}]/div')
+_XP_RISK_IMGS = _compile_xpath(f'./div[{_HAS["day-fc-symbol"]}]/img')
+
+_PATH_NEXTHOURS = f'./div[{_HAS["nexthours-scroll"]}]/div/div'
+_PATH_DAYS = f'./div[{_HAS["day-row"]}]/div/div'
+
+# column-wise selectors over all hour entries at once; the per-hour
+# fields are in document order, so the four result lists line up
+_XP_HOUR_TIMES = _compile_xpath(f'{_PATH_NEXTHOURS}/div[{_HAS["fc-hours"]}]/text()')
+_XP_HOUR_SYMBOLS = _compile_xpath(f'{_PATH_NEXTHOURS}/div[{_HAS["fc-symbol"]}]')
+_XP_HOUR_TEMPS = _compile_xpath(f'{_PATH_NEXTHOURS}/div[{_HAS["fc-temp"]}]/text()')
+_XP_HOUR_RAINS = _compile_xpath(f'{_PATH_NEXTHOURS}/div[{_HAS["fc-rain"]}]/text()')
+_XP_DAY_NODES = _compile_xpath(_PATH_DAYS)
+
+# shared across requests; skips nodes the parsers never look at
+_PARSER = etree.HTMLParser(
+    recover=True,
+    remove_blank_text=True,
+    remove_comments=True,
+    remove_pis=True,
+    encoding='utf-8',
+)
+
+
+def _run(xp, node):
     if node is None:
         return ()
     else:
-        return node.xpath(path, namespaces=namespaces)
+        return xp(node)
+
+
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix=__name__)
+
+
+def _parse_all(parse, nodes):
+    # lxml releases the GIL while evaluating XPath expressions, so the
+    # per-entry work overlaps; tiny batches are not worth the dispatch
+    if len(nodes) < 4:
+        return tuple(map(parse, nodes))
+    else:
+        return tuple(_POOL.map(parse, nodes))
 
 
 def parse_hour(hour_data):
-    hours, = xpath(hour_data, f'./xhtml:div[{has_class("fc-hours")}]/text()')
-    symbol, = xpath(hour_data, f'./xhtml:div[{has_class("fc-symbol")}]')
-    img, = xpath(symbol, './xhtml:img')
-    temperature, = xpath(hour_data, f'./xhtml:div[{has_class("fc-temp")}]/text()')
-    chance_of_rain, = xpath(hour_data, f'./xhtml:div[{has_class("fc-rain")}]/text()')
+    hours, = _run(_XP_FC_HOURS, hour_data)
+    symbol, = _run(_XP_FC_SYMBOL, hour_data)
+    img, = _run(_XP_IMG, symbol)
+    temperature, = _run(_XP_FC_TEMP, hour_data)
+    chance_of_rain, = _run(_XP_FC_RAIN, hour_data)
 
     hours, minutes = (
-        int(s, 10) for s in text_content(hours).split(maxsplit=1)[0].split(':', 1)
+        int(s, 10) for s in _TIME_RE.search(hours).groups()
     )
     friendly_name = symbol.get('title')
     symbol = extract_symbol(img)
-    temperature = float(text_content(temperature).split('°', 1)[0])
-    chance_of_rain = float(text_content(chance_of_rain).split('%', 1)[0]) / 100.0
+    temperature = _num(temperature)
+    chance_of_rain = _num(chance_of_rain) / 100.0
 
     return NextHoursData(
         hours=hours,
@@ -122,32 +225,26 @@ def parse_hour(hour_data):
 
 
 def parse_day(day_data):
-    friendly_name, date = xpath(day_data, f'./xhtml:div[{has_class("panel-heading")}]/text()')
-    body, = xpath(day_data, f'./xhtml:div[{has_class("panel-body")}]')
-    morning, = xpath(body, f'./xhtml:div[{has_class("wsymbol-morning")}]/xhtml:img')
-    afternoon, = xpath(body, f'./xhtml:div[{has_class("wsymbol-afternoon")}]/xhtml:img')
-    evening, = xpath(body, f'./xhtml:div[{has_class("wsymbol-evening")}]/xhtml:img')
-    minmax, = xpath(body, f'./xhtml:div[{has_class("day-temp-maxmin")}]')
-    temp_max, = xpath(
-        minmax,
-        f'./xhtml:div[{has_class("day-temp-max")}]/xhtml:div[{has_class("day-fc-temp")}]/text()',
-    )
-    temp_min, = xpath(
-        minmax,
-        f'./xhtml:div[{has_class("day-temp-min")}]/xhtml:div[{has_class("day-fc-temp")}]/text()',
-    )
-    risks, windrain = xpath(body, f'./xhtml:div[{has_class("day-risks")}]/xhtml:div')
-    avg_wind, max_wind, amount_rain = xpath(windrain, f'./xhtml:div[{has_class("fc-rain")}]/text()')
-    risks = xpath(risks, f'./xhtml:div[{has_class("day-fc-symbol")}]/xhtml:img')
-
-    friendly_name = text_content(friendly_name)
-    date = text_content(date)
-    temp_min = float(text_content(temp_min).split('°', 1)[0])
-    temp_max = float(text_content(temp_max).split('°', 1)[0])
-    avg_wind = float(text_content(avg_wind).split('k', 1)[0])
-    max_wind = float(text_content(max_wind).split('k', 1)[0])
-    amount_rain = float(text_content(amount_rain).split('m', 1)[0])
-    risks = [SkyData(friendly_name=None, symbol=extract_symbol(img)) for img in risks]
+    friendly_name, date = _run(_XP_PANEL_HEADING, day_data)
+    body, = _run(_XP_PANEL_BODY, day_data)
+    morning, = _run(_XP_MORNING_IMG, body)
+    afternoon, = _run(_XP_AFTERNOON_IMG, body)
+    evening, = _run(_XP_EVENING_IMG, body)
+    minmax, = _run(_XP_TEMP_MAXMIN, body)
+    temp_max, = _run(_XP_TEMP_MAX, minmax)
+    temp_min, = _run(_XP_TEMP_MIN, minmax)
+    risks, windrain = _run(_XP_DAY_RISKS, body)
+    avg_wind, max_wind, amount_rain = _run(_XP_FC_RAIN, windrain)
+    risks = _run(_XP_RISK_IMGS, risks)
+
+    friendly_name = _clean_text(friendly_name)
+    date = _clean_text(date)
+    temp_min = _num(temp_min)
+    temp_max = _num(temp_max)
+    avg_wind = _num(avg_wind)
+    max_wind = _num(max_wind)
+    amount_rain = _num(amount_rain)
+    risks = tuple(SkyData(friendly_name=None, symbol=extract_symbol(img)) for img in risks)
     morning = SkyData(friendly_name=morning.get('alt'), symbol=extract_symbol(morning))
     afternoon = SkyData(friendly_name=afternoon.get('alt'), symbol=extract_symbol(afternoon))
     evening = SkyData(friendly_name=evening.get('alt'), symbol=extract_symbol(evening))
@@ -167,6 +264,125 @@ def parse_day(day_data):
     )
 
 
+def _parse_hour_lexbor(hour_data):
+    hours = hour_data.css_first('div.fc-hours').text()
+    symbol = hour_data.css_first('div.fc-symbol')
+    img = symbol.css_first('img')
+    temperature = hour_data.css_first('div.fc-temp').text()
+    chance_of_rain = hour_data.css_first('div.fc-rain').text()
+
+    hours, minutes = (
+        int(s, 10) for s in _TIME_RE.search(hours).groups()
+    )
+    friendly_name = symbol.attributes.get('title')
+    symbol = _symbol_from_src(img.attributes['src'])
+    temperature = _num(temperature)
+    chance_of_rain = _num(chance_of_rain) / 100.0
+
+    return NextHoursData(
+        hours=hours,
+        minutes=minutes,
+        sky=SkyData(friendly_name=friendly_name, symbol=symbol),
+        temperature=temperature,
+        chance_of_rain=chance_of_rain,
+    )
+
+
+def _sky_from_img_lexbor(img):
+    return SkyData(friendly_name=img.attributes.get('alt'),
+                   symbol=_symbol_from_src(img.attributes['src']))
+
+
+def _text_pieces_lexbor(node):
+    # the non-blank direct text children, one piece per text node, so
+    # splitting happens on node boundaries and never on whitespace
+    # inside a text node
+    child = node.child
+    while child is not None:
+        if child.tag == '-text':
+            text = _clean_text(child.text_content)
+            if text:
+                yield text
+        child = child.next
+
+
+def _parse_day_lexbor(day_data):
+    friendly_name, date = _text_pieces_lexbor(day_data.css_first('div.panel-heading'))
+    body = day_data.css_first('div.panel-body')
+    morning = body.css_first('div.wsymbol-morning > img')
+    afternoon = body.css_first('div.wsymbol-afternoon > img')
+    evening = body.css_first('div.wsymbol-evening > img')
+    temp_max = body.css_first('div.day-temp-max div.day-fc-temp').text()
+    temp_min = body.css_first('div.day-temp-min div.day-fc-temp').text()
+    risks, windrain = body.css('div.day-risks > div')
+    avg_wind, max_wind, amount_rain = (node.text() for node in windrain.css('div.fc-rain'))
+    risks = risks.css('div.day-fc-symbol > img')
+
+    return NextDaysData(
+        friendly_name=friendly_name,
+        date=date,
+        temp_min=_num(temp_min),
+        temp_max=_num(temp_max),
+        avg_wind=_num(avg_wind),
+        max_wind=_num(max_wind),
+        amount_rain=_num(amount_rain),
+        risks=tuple(SkyData(friendly_name=None, symbol=_symbol_from_src(img.attributes['src']))
+                    for img in risks),
+        morning=_sky_from_img_lexbor(morning),
+        afternoon=_sky_from_img_lexbor(afternoon),
+        evening=_sky_from_img_lexbor(evening),
+    )
+
+
+def _parse_response_lexbor(content):
+    tree = LexborHTMLParser(content)
+
+    data_hours = _parse_all(_parse_hour_lexbor, tree.css('div.nexthours-scroll > div > div'))
+    data_days = _parse_all(_parse_day_lexbor, tree.css('div.day-row > div > div'))
+
+    return NextHoursDaysData(data_hours, data_days)
+
+
+def _parse_hours_lxml(root):
+    times = _XP_HOUR_TIMES(root)
+    symbols = _XP_HOUR_SYMBOLS(root)
+    temperatures = [float(m.group()) for m in map(_NUM_RE.search, _XP_HOUR_TEMPS(root))]
+    chances_of_rain = [float(m.group()) / 100.0 for m in map(_NUM_RE.search, _XP_HOUR_RAINS(root))]
+
+    data_hours = []
+    for time, symbol, temperature, chance_of_rain in zip(
+        times, symbols, temperatures, chances_of_rain, strict=True,
+    ):
+        hours, minutes = (int(s, 10) for s in _TIME_RE.search(time).groups())
+        img, = _run(_XP_IMG, symbol)
+        data_hours.append(NextHoursData(
+            hours=hours,
+            minutes=minutes,
+            sky=SkyData(friendly_name=symbol.get('title'), symbol=extract_symbol(img)),
+            temperature=temperature,
+            chance_of_rain=chance_of_rain,
+        ))
+
+    return tuple(data_hours)
+
+
+def _parse_response_lxml(content):
+    # libxml2 wraps the fragment into html/body around the root element
+    root = etree.fromstring(b'<root>' + content + b'</root>', _PARSER).find('body/root')
+
+    data_hours = _parse_hours_lxml(root)
+    data_days = _parse_all(parse_day, _XP_DAY_NODES(root))
+
+    return NextHoursDaysData(data_hours, data_days)
+
+
+def _parse_response(content):
+    if LexborHTMLParser is not None:
+        return _parse_response_lexbor(content)
+    else:
+        return _parse_response_lxml(content)
+
+
 class KachelmannWetter:
     AJAX_URL = 'https://kachelmannwetter.com/de/ajax_pub'
 
@@ -175,11 +391,40 @@ class KachelmannWetter:
                  location_cache: Optional[LocationCache] = None):
         if get_session is None:
             get_session = new_session_getter(self.__class__.__name__)
-        if location_cache is None:
+        owns_location_cache = location_cache is None
+        if owns_location_cache:
             location_cache = LocationCache()
 
         self.get_session = get_session
         self.location_cache = location_cache
+        self._owns_location_cache = owns_location_cache
+        self._async_client = None
+        self._async_header_version = None
+
+    async def _get_async_client(self):
+        # mirrors new_session_getter(): a client built before the last
+        # invalidate_sessions()/set_user_agent() call is stale and gets
+        # replaced, since httpx snapshots the headers at construction
+        client = self._async_client
+        version = _current_header_version()
+        if client is None or self._async_header_version != version:
+            if client is not None:
+                await client.aclose()
+            client = self._async_client = new_async_client()
+            self._async_header_version = version
+        return client
+
+    async def aclose(self):
+        '''Close the asynchronous clients, if any were created.
+
+        A self-created location cache is closed along with this object;
+        a location cache passed in by the caller is not touched.
+        '''
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+        if self._owns_location_cache:
+            await self.location_cache.aclose()
 
     def next_hours_days(self, location: AnyLocation) -> Optional[NextHoursDaysData]:
         city_id = self.location_cache.get_station_id(location)
@@ -188,24 +433,36 @@ class KachelmannWetter:
 
         url = f'{self.AJAX_URL}/weathernexthoursdays?city_id={city_id}&lang=de&units=de&tf=1'
         with self.get_session() as session:
-            with session.get(url) as resp:
+            with session.get(url, stream=True) as resp:
                 status_code = resp.status_code
-                if resp.status_code not in range(200, 300):
+                if not (200 <= status_code < 300):
                     logger.warn('Could not retrieve date for url=%r, status_code=%r',
                                 url, status_code)
                     return
 
-                content = resp.text
+                # bytes, not resp.text: the HTML parser detects the encoding
+                # itself, so there is no need to decode to str first
+                content = resp.content
+
+        return _parse_response(content)
 
-        root = fragment_fromstring(content, create_parent='root')
+    async def next_hours_days_async(self, location: AnyLocation) -> Optional[NextHoursDaysData]:
+        '''Asynchronous twin of next_hours_days().
 
-        data_hours = xpath(
-            root,
-            f'/root/xhtml:div[{has_class("nexthours-scroll")}]/xhtml:div/xhtml:div',
-        )
-        data_hours = [parse_hour(hour_data) for hour_data in data_hours]
+        Many calls can be in flight concurrently over a single HTTP/2
+        connection, e.g. via asyncio.gather().
+        '''
+        city_id = await self.location_cache.get_station_id_async(location)
+        if city_id is None:
+            return
 
-        data_days = xpath(root, f'/root/xhtml:div[{has_class("day-row")}]/xhtml:div/xhtml:div')
-        data_days = [parse_day(day_data) for day_data in data_days]
+        url = f'{self.AJAX_URL}/weathernexthoursdays?city_id={city_id}&lang=de&units=de&tf=1'
+        client = await self._get_async_client()
+        resp = await client.get(url)
+        status_code = resp.status_code
+        if not (200 <= status_code < 300):
+            logger.warn('Could not retrieve date for url=%r, status_code=%r',
+                        url, status_code)
+            return
 
-        return NextHoursDaysData(data_hours, data_days)
+        return _parse_response(resp.content)
@@ -18,14 +18,15 @@ setup(
     url='https://github.com/plistig/kachelmann-wetter-getter',
     download_url='https://github.com/plistig/kachelmann-wetter-getter/archive/master.zip',
     license='Apache License (2.0)',
-    python_requires='>=3.6',
+    python_requires='>=3.10',
     install_requires=(
-        'cchardet >= 2.1.1',
-        'dataclasses >= 0.5',
-        'html5lib >= 1.0.1',
         'lxml >= 4.2.1',
         'requests >= 2.18.4',
     ),
+    extras_require={
+        'async': ('httpx[http2] >= 0.23',),
+        'fast': ('selectolax >= 0.3',),
+    },
     packages=(module_name,),
     package_data={
         module_name: ('*.py', 'VERSION'),